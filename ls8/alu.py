@@ -1,47 +1,20 @@
-from typing import Callable, List, TYPE_CHECKING
-
-
-if TYPE_CHECKING:
-    from cpu import CPU
+flag_equal = 0b001
+flag_greater = 0b010
+flag_less = 0b100
 
 
 class ALU:
-    """ALU - Arithmetic Logic Unit"""
-
-    def __init__(self, cpu: "CPU"):
-        self.cpu = cpu
-
-    def reg_operation(self, alu_operation: Callable):
-        """
-        Build an ALU operation that uses an arbitrary number
-        of registers and sets the result to the first register
-        """
+    """
+    ALU - Arithmetic Logic Unit
 
-        def operation(*registers: List[int]):
-            values = [self.cpu.registers[reg] for reg in registers]
-            self.cpu.registers[registers[0]] = alu_operation(*values)
-
-            return 1
-
-        return operation
-
-    def compare_operation(self, reg_a: int, reg_b: int):
-        """
-        Compare the two registers and set CPU flags based on
-        the results
-        """
+    Mixed into the CPU so that operations work directly on its registers
+    and flags
+    """
 
-        a = self.cpu.registers[reg_a]
-        b = self.cpu.registers[reg_b]
-        self.cpu.flags['E'] = int(a == b)
-        self.cpu.flags['L'] = int(a < b)
-        self.cpu.flags['G'] = int(a > b)
-
-        return 1
+    __slots__ = ()
 
     ##### OPERATIONS ####
-    @property
-    def ADD(self):
+    def ADD(self, reg_a: int, reg_b: int):
         """
         `ADD registerA registerB`
 
@@ -54,10 +27,12 @@ class ALU:
         ```
         """
 
-        return self.reg_operation(lambda a, b: a + b)
+        registers = self.registers
+        registers[reg_a] = (registers[reg_a] + registers[reg_b]) & 0xFF
 
-    @property
-    def SUB(self):
+        return 1
+
+    def SUB(self, reg_a: int, reg_b: int):
         """
         `SUB registerA registerB`
 
@@ -71,10 +46,12 @@ class ALU:
         ```
         """
 
-        return self.reg_operation(lambda a, b: a - b)
+        registers = self.registers
+        registers[reg_a] = (registers[reg_a] - registers[reg_b]) & 0xFF
+
+        return 1
 
-    @property
-    def MUL(self):
+    def MUL(self, reg_a: int, reg_b: int):
         """
         `MUL registerA registerB`
 
@@ -87,10 +64,12 @@ class ALU:
         ```
         """
 
-        return self.reg_operation(lambda a, b: a * b)
+        registers = self.registers
+        registers[reg_a] = (registers[reg_a] * registers[reg_b]) & 0xFF
+
+        return 1
 
-    @property
-    def DIV(self):
+    def DIV(self, reg_a: int, reg_b: int):
         """
         `DIV registerA registerB`
 
@@ -107,10 +86,12 @@ class ALU:
         ```
         """
 
-        return self.reg_operation(lambda a, b: a / b)
+        registers = self.registers
+        registers[reg_a] = registers[reg_a] // registers[reg_b]
+
+        return 1
 
-    @property
-    def MOD(self):
+    def MOD(self, reg_a: int, reg_b: int):
         """
         `MOD registerA registerB`
 
@@ -127,10 +108,12 @@ class ALU:
         ```
         """
 
-        return self.reg_operation(lambda a, b: a % b)
+        registers = self.registers
+        registers[reg_a] = registers[reg_a] % registers[reg_b]
 
-    @property
-    def INC(self):
+        return 1
+
+    def INC(self, reg_a: int, _b: int = 0):
         """
         `INC register`
 
@@ -144,10 +127,12 @@ class ALU:
         ```
         """
 
-        return self.reg_operation(lambda a: a + 1)
+        registers = self.registers
+        registers[reg_a] = (registers[reg_a] + 1) & 0xFF
 
-    @property
-    def DEC(self):
+        return 1
+
+    def DEC(self, reg_a: int, _b: int = 0):
         """
         `DEC register`
 
@@ -160,10 +145,12 @@ class ALU:
         ```
         """
 
-        return self.reg_operation(lambda a: a - 1)
+        registers = self.registers
+        registers[reg_a] = (registers[reg_a] - 1) & 0xFF
+
+        return 1
 
-    @property
-    def CMP(self):
+    def CMP(self, reg_a: int, reg_b: int):
         """
         `CMP registerA registerB`
 
@@ -184,10 +171,19 @@ class ALU:
         ```
         """
 
-        return self.compare_operation
+        registers = self.registers
+        a = registers[reg_a]
+        b = registers[reg_b]
+        if a == b:
+            self.fl = flag_equal
+        elif a < b:
+            self.fl = flag_less
+        else:
+            self.fl = flag_greater
+
+        return 1
 
-    @property
-    def AND(self):
+    def AND(self, reg_a: int, reg_b: int):
         """
         `AND registerA registerB`
 
@@ -201,10 +197,12 @@ class ALU:
         ```
         """
 
-        return self.reg_operation(lambda a, b: a & b)
+        registers = self.registers
+        registers[reg_a] = registers[reg_a] & registers[reg_b]
+
+        return 1
 
-    @property
-    def NOT(self):
+    def NOT(self, reg_a: int, _b: int = 0):
         """
         `NOT register`
 
@@ -218,10 +216,12 @@ class ALU:
         ```
         """
 
-        return self.reg_operation(lambda a: ~a)
+        registers = self.registers
+        registers[reg_a] = ~registers[reg_a] & 0xFF
 
-    @property
-    def OR(self):
+        return 1
+
+    def OR(self, reg_a: int, reg_b: int):
         """
         `OR registerA registerB`
 
@@ -236,10 +236,12 @@ class ALU:
         ```
         """
 
-        return self.reg_operation(lambda a, b: a | b)
+        registers = self.registers
+        registers[reg_a] = registers[reg_a] | registers[reg_b]
 
-    @property
-    def XOR(self):
+        return 1
+
+    def XOR(self, reg_a: int, reg_b: int):
         """
         `XOR registerA registerB`
 
@@ -254,10 +256,12 @@ class ALU:
         ```
         """
 
-        return self.reg_operation(lambda a, b: a ^ b)
+        registers = self.registers
+        registers[reg_a] = registers[reg_a] ^ registers[reg_b]
+
+        return 1
 
-    @property
-    def SHL(self):
+    def SHL(self, reg_a: int, reg_b: int):
         """
         Shift the value in registerA left by the number of bits specified in registerB,
         filling the low bits with 0.
@@ -269,10 +273,12 @@ class ALU:
         ```
         """
 
-        return self.reg_operation(lambda a, b: a << b)
+        registers = self.registers
+        registers[reg_a] = (registers[reg_a] << registers[reg_b]) & 0xFF
+
+        return 1
 
-    @property
-    def SHR(self):
+    def SHR(self, reg_a: int, reg_b: int):
         """
         Shift the value in registerA right by the number of bits specified in registerB,
         filling the high bits with 0.
@@ -284,4 +290,7 @@ class ALU:
         ```
         """
 
-        return self.reg_operation(lambda a, b: a >> b)
+        registers = self.registers
+        registers[reg_a] = registers[reg_a] >> registers[reg_b]
+
+        return 1
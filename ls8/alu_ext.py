@@ -1,25 +1,12 @@
 from alu import ALU
-from typing import Callable
 
 
 class ALU_EXT(ALU):
     """Extended ALU with more operations"""
 
-    def immediate_operation(self, alu_operation: Callable):
-        """
-        Build an ALU operation that uses a register and immediate
-        and sets the register to the result of the operation
-        """
-
-        def operation(register: int, immediate: int):
-            reg_value = self.cpu.registers[register]
-            self.cpu.registers[register] = alu_operation(reg_value, immediate)
-
-            return 1
+    __slots__ = ()
 
-        return operation
-
-    def ADDI(self):
+    def ADDI(self, reg_a: int, immediate: int):
         """
         `ADDI registerA immediate`
 
@@ -32,4 +19,8 @@ class ALU_EXT(ALU):
         B0 0r ii
         ```
         """
-        return self.immediate_operation(lambda a, b: a + b)
+
+        registers = self.registers
+        registers[reg_a] = (registers[reg_a] + immediate) & 0xFF
+
+        return 1
@@ -1,7 +1,10 @@
+from alu import flag_equal, flag_greater, flag_less
 from alu_ext import ALU_EXT
-from datetime import datetime, timedelta
+from array import array
+from os import read
 from select import select
 from sys import stdin
+from time import monotonic
 
 interrupt_mask = 5
 interrupt_status = 6
@@ -10,79 +13,47 @@ stack_pointer = 7
 last_key = -12
 stack_start = -13
 
-interupts = list(range(-8, 0))
+interrupt_vectors = -8
+timer_interrupt = 0
+keyboard_interrupt = 1
 
+# Instruction length by opcode, bits 7:6 hold the number of operands
+instruction_sizes = bytes((op >> 6) + 1 for op in range(256))
 
-class CPU:
+# Number of instructions between checks of the timer and keyboard
+poll_interval = 1024
+
+
+class CPU(ALU_EXT):
     """CPU - Central Processing Unit"""
 
+    __slots__ = (
+        'used_ram', 'ram_size', 'ram', 'registers', 'interupting', 'last_timer',
+        'fl', 'program_counter'
+    )
+
     def __init__(self):
         self.used_ram = 0
         self.ram_size = 256
-        self.ram = [0] * self.ram_size
+        self.ram = bytearray(self.ram_size)
 
-        self.registers = [-1] * 8
+        self.registers = array('i', [-1] * 8)
         self.registers[interrupt_mask] = 0
         self.registers[interrupt_status] = 0
         self.registers[stack_pointer] = stack_start
 
         self.interupting = False
-        self.last_timer = datetime.now()
-
-        self.flags = {'E': 0, 'L': 0, 'G': 0}
-        self.program_counter = -1
-
-        alu = ALU_EXT(self)
-
-        self.operations = {}
-        self.operations[0b00000000] = self.NOP
-        self.operations[0b00000001] = self.HLT
-        self.operations[0b00010001] = self.RET
-        self.operations[0b00010011] = self.IRET
-        self.operations[0b01000101] = self.PUSH
-        self.operations[0b01000110] = self.POP
-        self.operations[0b01000111] = self.PRN
-        self.operations[0b01001000] = self.PRA
-        self.operations[0b01010000] = self.CALL
-        self.operations[0b01010010] = self.INT
-        self.operations[0b01010100] = self.JMP
-        self.operations[0b01010101] = self.JEQ
-        self.operations[0b01010110] = self.JNE
-        self.operations[0b01010111] = self.JGT
-        self.operations[0b01011000] = self.JLT
-        self.operations[0b01011001] = self.JLE
-        self.operations[0b01011010] = self.JGE
-        self.operations[0b10000010] = self.LDI
-        self.operations[0b10000011] = self.LD
-        self.operations[0b10000100] = self.ST
-        self.operations[0b10100000] = alu.ADD
-        self.operations[0b10100001] = alu.SUB
-        self.operations[0b10100010] = alu.MUL
-        self.operations[0b10100011] = alu.DIV
-        self.operations[0b10100100] = alu.MOD
-        self.operations[0b01100101] = alu.INC
-        self.operations[0b01100110] = alu.DEC
-        self.operations[0b10100111] = alu.CMP
-        self.operations[0b10101000] = alu.AND
-        self.operations[0b01101001] = alu.NOT
-        self.operations[0b10101010] = alu.OR
-        self.operations[0b10101011] = alu.XOR
-        self.operations[0b10101100] = alu.SHL
-        self.operations[0b10101101] = alu.SHR
-        self.operations[0b10110000] = alu.ADDI
+        self.last_timer = monotonic()
 
-    @property
-    def next_byte(self):
-        """Get the next byte tracked by the program counter"""
-
-        self.program_counter += 1
-        return self.ram[self.program_counter]
+        self.fl = 0
+        self.program_counter = 0
 
     @property
     def stack(self):
-        """Return an array of the current stack"""
+        """Return a read-only view of the current stack, top of stack last"""
 
-        return self.ram[stack_start:self.registers[stack_pointer]:-1]
+        view = memoryview(self.ram).toreadonly()
+        return view[stack_start:self.registers[stack_pointer]:-1]
 
     def load(self, file: str):
         """Load a program into RAM"""
@@ -105,7 +76,7 @@ class CPU:
         """Load a value into the next memory address"""
 
         if self.used_ram < self.ram_size + self.registers[stack_pointer]:
-            self.ram[self.used_ram] = value
+            self.ram[self.used_ram] = value & 0xFF
             self.used_ram += 1
         else:
             raise Exception("RAM is FULL")
@@ -113,65 +84,128 @@ class CPU:
     def run(self):
         """Run the program currently loaded into RAM"""
 
+        ram = self.ram
+        registers = self.registers
+        sizes = instruction_sizes
+        operations = self.operations
+        process_interupt = self.process_interupt
+
+        running = 1
+        countdown = poll_interval
+        while running:
+            if registers[interrupt_status]:
+                process_interupt()
+
+            # Same as self.execute(), inlined to keep lookups local
+            pc = self.program_counter
+            operation = ram[pc]
+            size = sizes[operation]
+
+            self.program_counter = pc + size
+            running = operations[operation](
+                self,
+                ram[pc + 1] if size > 1 else 0,
+                ram[pc + 2] if size > 2 else 0
+            )
+
+            countdown -= 1
+            if not countdown:
+                countdown = poll_interval
+                self.interupt_timer()
+                self.keyboard_poll()
+
+    def run_with(self, run, ram, registers):
+        """
+        Run the program currently loaded into RAM through a native `run` loop
+
+        `run(ram, registers, fl, program_counter, used_ram, interupting, limit)`
+        executes what it can and returns the program counter, `FL` and the
+        number of instructions it ran; everything else is left to `execute`.
+        The timer and keyboard are polled on the same schedule as `run`.
+        """
+
+        process_interupt = self.process_interupt
+        execute = self.execute
+
         running = 1
+        countdown = poll_interval
         while running:
-            self.process_interupt()
-            running = self.execute()
-            self.interupt_timer()
-            self.keyboard_poll()
+            process_interupt()
+
+            self.program_counter, self.fl, executed = run(
+                ram, registers, self.fl, self.program_counter, self.used_ram,
+                self.interupting, countdown
+            )
+            countdown -= executed
+            if countdown:
+                process_interupt()
+                running = execute()
+                countdown -= 1
+
+            if not countdown:
+                countdown = poll_interval
+                self.interupt_timer()
+                self.keyboard_poll()
 
     def process_interupt(self):
         """Process any interupts if they exist"""
 
-        if self.registers[interrupt_status] and not self.interupting:
-            masked_interrupts = self.registers[interrupt_mask] & self.registers[interrupt_status]
+        registers = self.registers
+        if registers[interrupt_status] and not self.interupting:
+            masked_interrupts = registers[interrupt_mask] & registers[interrupt_status]
 
             for i in range(8):
                 interrupt_happened = ((masked_interrupts >> i) & 1) == 1
                 if interrupt_happened:
                     self.interupting = True
-                    self.registers[interrupt_status] ^= 1 << i
-
-                    self.stack_push(self.program_counter)
-                    self.stack_push(self.flags)
-
-                    for reg in range(7):
-                        self.stack_push(self.registers[reg])
-
-                    self.program_counter = self.ram[interupts[i]] - 1
+                    registers[interrupt_status] ^= 1 << i
+
+                    push = self.stack_push
+                    push(self.program_counter)
+                    push(self.fl)
+                    push(registers[0])
+                    push(registers[1])
+                    push(registers[2])
+                    push(registers[3])
+                    push(registers[4])
+                    push(registers[5])
+                    push(registers[6])
+
+                    self.program_counter = self.ram[interrupt_vectors + i]
                     break
 
     def execute(self):
         """Execute the next operation"""
 
-        operation = self.next_byte
-
-        if operation in self.operations:
-            args = []
-            if operation & (1 << 7):
-                args = [self.next_byte, self.next_byte]
-            elif operation & (1 << 6):
-                args = [self.next_byte]
+        ram = self.ram
+        pc = self.program_counter
+        operation = ram[pc]
+        size = instruction_sizes[operation]
 
-            return self.operations[operation](*args)
-
-        else:
-            raise Exception("Unsupported instruction")
+        self.program_counter = pc + size
+        return self.operations[operation](
+            self,
+            ram[pc + 1] if size > 1 else 0,
+            ram[pc + 2] if size > 2 else 0
+        )
 
     def interupt_timer(self):
         """Trigger a timer interupt if 1 second has passed between the last timer interupt"""
 
-        current_time = datetime.now()
-        if current_time - self.last_timer > timedelta(seconds=1) and self.ram[interupts[0]]:
-            self.last_timer = current_time
-            self.registers[interrupt_status] |= 1 << 0
+        if self.ram[interrupt_vectors + timer_interrupt]:
+            current_time = monotonic()
+            if current_time - self.last_timer > 1:
+                self.last_timer = current_time
+                self.registers[interrupt_status] |= 1 << timer_interrupt
 
     def keyboard_poll(self):
         """Check for keyboard inputs and if any exist send an interupt"""
 
-        if select([stdin], [], [], 0) == ([stdin], [], []):
-            self.ram[last_key] = ord(stdin.read(1))
-            self.registers[interrupt_status] |= 1 << 1
+        if select([stdin], [], [], 0)[0]:
+            key = read(stdin.fileno(), 1)
+            if key:
+                self.ram[last_key] = key[0]
+                self.registers[interrupt_status] |= 1 << keyboard_interrupt
 
     def trace(self):
         """
@@ -179,38 +213,59 @@ class CPU:
         from run() if you need help debugging
         """
 
+        pc = self.program_counter
         print(f"TRACE: %02X | %02X %02X %02X |" % (
-            self.program_counter,
-            self.next_byte,
-            self.next_byte,
-            self.next_byte
+            pc & 0xFF,
+            self.ram[pc % self.ram_size],
+            self.ram[(pc + 1) % self.ram_size],
+            self.ram[(pc + 2) % self.ram_size]
         ), end='')
 
         for reg in self.registers:
-            print(" %02X" % reg, end='')
+            print(" %02X" % (reg & 0xFF), end='')
 
         print()
 
     def stack_push(self, value):
-        """Push a item onto the stack"""
+        """
+        Push a item onto the stack
 
-        if (self.used_ram - self.registers[stack_pointer]) - self.ram_size < 0:
-            self.ram[self.registers[stack_pointer]] = value
-            self.registers[stack_pointer] -= 1
-        else:
-            raise Exception("Stack Overflow")
+        The overflow check is skipped when running with `python -O`
+        """
+
+        registers = self.registers
+        sp = registers[stack_pointer]
+        if __debug__:
+            if (self.used_ram - sp) - self.ram_size >= 0:
+                raise Exception("Stack Overflow")
+
+        self.ram[sp] = value & 0xFF
+        registers[stack_pointer] = sp - 1
 
     def stack_pop(self):
-        """Pop an item off the stack"""
+        """
+        Pop an item off the stack
 
-        if self.registers[stack_pointer] < stack_start:
-            self.registers[stack_pointer] += 1
-            return self.ram[self.registers[stack_pointer]]
-        else:
-            raise Exception("Stack Underflow")
+        The underflow check is skipped when running with `python -O`
+        """
+
+        registers = self.registers
+        sp = registers[stack_pointer]
+        if __debug__:
+            if sp >= stack_start:
+                raise Exception("Stack Underflow")
+
+        sp += 1
+        registers[stack_pointer] = sp
+        return self.ram[sp]
+
+    def _bad_op(self, *args):
+        """Fill every opcode slot without a handler in the dispatch table"""
+
+        raise Exception("Unsupported instruction")
 
     ##### OPERATIONS ####
-    def NOP(self):
+    def NOP(self, _a: int = 0, _b: int = 0):
         """
         `NOP`
 
@@ -225,7 +280,7 @@ class CPU:
 
         return 2
 
-    def HLT(self):
+    def HLT(self, _a: int = 0, _b: int = 0):
         """
         `HLT`
 
@@ -240,7 +295,7 @@ class CPU:
 
         return 0
 
-    def RET(self):
+    def RET(self, _a: int = 0, _b: int = 0):
         """
         `RET`
 
@@ -259,7 +314,7 @@ class CPU:
 
         return 1
 
-    def IRET(self):
+    def IRET(self, _a: int = 0, _b: int = 0):
         """
         `IRET`
 
@@ -279,16 +334,23 @@ class CPU:
         ```
         """
 
-        for i in range(6, -1, -1):
-            self.registers[i] = self.stack_pop()
+        registers = self.registers
+        pop = self.stack_pop
+        registers[6] = pop()
+        registers[5] = pop()
+        registers[4] = pop()
+        registers[3] = pop()
+        registers[2] = pop()
+        registers[1] = pop()
+        registers[0] = pop()
 
-        self.flags = self.stack_pop()
-        self.program_counter = self.stack_pop()
+        self.fl = pop() & (flag_equal | flag_greater | flag_less)
+        self.program_counter = pop()
         self.interupting = False
 
         return 1
 
-    def PUSH(self, reg_a: int):
+    def PUSH(self, reg_a: int, _b: int = 0):
         """
         `PUSH register`
 
@@ -310,7 +372,7 @@ class CPU:
 
         return 1
 
-    def POP(self, reg_a: int):
+    def POP(self, reg_a: int, _b: int = 0):
         """
         `POP register`
 
@@ -330,7 +392,7 @@ class CPU:
 
         return 1
 
-    def PRN(self, reg_a: int):
+    def PRN(self, reg_a: int, _b: int = 0):
         """
         `PRN register` pseudo-instruction
 
@@ -351,7 +413,7 @@ class CPU:
 
         return 1
 
-    def PRA(self, reg_a: int):
+    def PRA(self, reg_a: int, _b: int = 0):
         """
         `PRA register` pseudo-instruction
 
@@ -372,7 +434,7 @@ class CPU:
 
         return 1
 
-    def CALL(self, reg_a: int):
+    def CALL(self, reg_a: int, _b: int = 0):
         """
         `CALL register`
 
@@ -395,11 +457,11 @@ class CPU:
 
         to = self.registers[reg_a]
         self.stack_push(self.program_counter)
-        self.program_counter = to - 1
+        self.program_counter = to
 
         return 1
 
-    def INT(self, reg_a: int):
+    def INT(self, reg_a: int, _b: int = 0):
         """
         `INT register`
 
@@ -415,12 +477,12 @@ class CPU:
         ```
         """
 
-        bit = self.registers[reg_a]
-        self.registers[interrupt_status] |= 1 << bit
+        registers = self.registers
+        registers[interrupt_status] |= 1 << registers[reg_a]
 
         return 1
 
-    def JMP(self, reg_a: int):
+    def JMP(self, reg_a: int, _b: int = 0):
         """
         `JMP register`
 
@@ -436,11 +498,11 @@ class CPU:
         """
 
         to = self.registers[reg_a]
-        self.program_counter = to - 1
+        self.program_counter = to
 
         return 1
 
-    def JEQ(self, reg_a: int):
+    def JEQ(self, reg_a: int, _b: int = 0):
         """
         `JEQ register`
 
@@ -453,12 +515,12 @@ class CPU:
         ```
         """
 
-        if self.flags['E']:
-            return self.JMP(reg_a)
-        else:
-            return 2
+        if self.fl & flag_equal:
+            self.program_counter = self.registers[reg_a]
+
+        return 1
 
-    def JNE(self, reg_a: int):
+    def JNE(self, reg_a: int, _b: int = 0):
         """
         `JNE register`
 
@@ -472,12 +534,12 @@ class CPU:
         ```
         """
 
-        if not self.flags['E']:
-            return self.JMP(reg_a)
-        else:
-            return 2
+        if not self.fl & flag_equal:
+            self.program_counter = self.registers[reg_a]
+
+        return 1
 
-    def JGT(self, reg_a: int):
+    def JGT(self, reg_a: int, _b: int = 0):
         """
         `JGT register`
 
@@ -492,12 +554,12 @@ class CPU:
         ```
         """
 
-        if self.flags['G']:
-            return self.JMP(reg_a)
-        else:
-            return 2
+        if self.fl & flag_greater:
+            self.program_counter = self.registers[reg_a]
+
+        return 1
 
-    def JLT(self, reg_a: int):
+    def JLT(self, reg_a: int, _b: int = 0):
         """
         `JLT register`
 
@@ -512,12 +574,12 @@ class CPU:
         ```
         """
 
-        if self.flags['L']:
-            return self.JMP(reg_a)
-        else:
-            return 2
+        if self.fl & flag_less:
+            self.program_counter = self.registers[reg_a]
 
-    def JLE(self, reg_a: int):
+        return 1
+
+    def JLE(self, reg_a: int, _b: int = 0):
         """
         `JLE register`
 
@@ -531,12 +593,12 @@ class CPU:
         ```
         """
 
-        if self.flags['E'] or self.flags['L']:
-            return self.JMP(reg_a)
-        else:
-            return 2
+        if self.fl & (flag_equal | flag_less):
+            self.program_counter = self.registers[reg_a]
 
-    def JGE(self, reg_a: int):
+        return 1
+
+    def JGE(self, reg_a: int, _b: int = 0):
         """
         `JGE register`
 
@@ -551,10 +613,10 @@ class CPU:
         ```
         """
 
-        if self.flags['E'] or self.flags['G']:
-            return self.JMP(reg_a)
-        else:
-            return 2
+        if self.fl & (flag_equal | flag_greater):
+            self.program_counter = self.registers[reg_a]
+
+        return 1
 
     def LDI(self, reg_a: int, value: int):
         """
@@ -588,9 +650,8 @@ class CPU:
         ```
         """
 
-        address = self.registers[reg_b]
-        value = self.ram[address]
-        self.registers[reg_a] = value
+        registers = self.registers
+        registers[reg_a] = self.ram[registers[reg_b]]
 
         return 1
 
@@ -609,8 +670,45 @@ class CPU:
         ```
         """
 
-        address = self.registers[reg_a]
-        value = self.registers[reg_b]
-        self.ram[address] = value
+        registers = self.registers
+        self.ram[registers[reg_a]] = registers[reg_b] & 0xFF
 
         return 1
+
+    ##### DISPATCH TABLE ####
+    operations = [_bad_op] * 256
+    operations[0b00000000] = NOP
+    operations[0b00000001] = HLT
+    operations[0b00010001] = RET
+    operations[0b00010011] = IRET
+    operations[0b01000101] = PUSH
+    operations[0b01000110] = POP
+    operations[0b01000111] = PRN
+    operations[0b01001000] = PRA
+    operations[0b01010000] = CALL
+    operations[0b01010010] = INT
+    operations[0b01010100] = JMP
+    operations[0b01010101] = JEQ
+    operations[0b01010110] = JNE
+    operations[0b01010111] = JGT
+    operations[0b01011000] = JLT
+    operations[0b01011001] = JLE
+    operations[0b01011010] = JGE
+    operations[0b10000010] = LDI
+    operations[0b10000011] = LD
+    operations[0b10000100] = ST
+    operations[0b10100000] = ALU_EXT.ADD
+    operations[0b10100001] = ALU_EXT.SUB
+    operations[0b10100010] = ALU_EXT.MUL
+    operations[0b10100011] = ALU_EXT.DIV
+    operations[0b10100100] = ALU_EXT.MOD
+    operations[0b01100101] = ALU_EXT.INC
+    operations[0b01100110] = ALU_EXT.DEC
+    operations[0b10100111] = ALU_EXT.CMP
+    operations[0b10101000] = ALU_EXT.AND
+    operations[0b01101001] = ALU_EXT.NOT
+    operations[0b10101010] = ALU_EXT.OR
+    operations[0b10101011] = ALU_EXT.XOR
+    operations[0b10101100] = ALU_EXT.SHL
+    operations[0b10101101] = ALU_EXT.SHR
+    operations[0b10110000] = ALU_EXT.ADDI
@@ -8,4 +8,14 @@ from cpu import CPU
 cpu = CPU()
 
 cpu.load(sys.argv[1])
-cpu.run()
+
+if "--jit" in sys.argv[2:]:
+    from vm_njit import run_cpu
+    run_cpu(cpu)
+elif "--native" in sys.argv[2:]:
+    import pyximport
+    pyximport.install(language_level=3)
+    from _vm import run_cpu
+    run_cpu(cpu)
+else:
+    cpu.run()
@@ -0,0 +1,168 @@
+"""LS-8 interpreter loop compiled to native code with Numba"""
+
+import numpy as np
+from numba import njit
+from typing import TYPE_CHECKING
+
+
+if TYPE_CHECKING:
+    from cpu import CPU
+
+flag_equal = 0b001
+flag_greater = 0b010
+flag_less = 0b100
+
+interrupt_mask = 5
+interrupt_status = 6
+stack_pointer = 7
+stack_start = -13
+
+
+@njit(cache=True)
+def stack_push(ram, registers, used_ram, value):
+    """Push a item onto the stack"""
+
+    sp = registers[stack_pointer]
+    if (used_ram - sp) - ram.size < 0:
+        ram[sp & 0xFF] = value & 0xFF
+        registers[stack_pointer] = sp - 1
+    else:
+        raise Exception("Stack Overflow")
+
+
+@njit(cache=True)
+def stack_pop(ram, registers):
+    """Pop an item off the stack"""
+
+    sp = registers[stack_pointer]
+    if sp < stack_start:
+        registers[stack_pointer] = sp + 1
+        return ram[(sp + 1) & 0xFF]
+    else:
+        raise Exception("Stack Underflow")
+
+
+@njit(cache=True)
+def run(ram, registers, fl, program_counter, used_ram, interupting, limit):
+    """
+    Run up to `limit` instructions starting at `program_counter`
+
+    Execution stops before any instruction that needs the CPU (`HLT`, `PRN`,
+    `PRA`, `INT`, `IRET` or an unsupported opcode), or once an unmasked
+    interrupt is pending and `interupting` is not set, and the program
+    counter, `FL` register and number of instructions run are returned so the
+    CPU can handle it and resume.
+    """
+
+    pc = program_counter
+    for n in range(limit):
+        if not interupting and registers[interrupt_mask] & registers[interrupt_status]:
+            return pc, fl, n
+
+        op = ram[pc & 0xFF]
+        a = ram[(pc + 1) & 0xFF] & 0b111
+        b = ram[(pc + 2) & 0xFF]
+        rb = registers[b & 0b111]
+
+        if op == 0x00:  # NOP
+            pc += 1
+        elif op == 0x11:  # RET
+            pc = stack_pop(ram, registers)
+        elif op == 0x45:  # PUSH
+            stack_push(ram, registers, used_ram, registers[a])
+            pc += 2
+        elif op == 0x46:  # POP
+            registers[a] = stack_pop(ram, registers)
+            pc += 2
+        elif op == 0x50:  # CALL
+            to = registers[a]
+            stack_push(ram, registers, used_ram, pc + 2)
+            pc = to
+        elif op == 0x54:  # JMP
+            pc = registers[a]
+        elif op == 0x55:  # JEQ
+            pc = registers[a] if fl & flag_equal else pc + 2
+        elif op == 0x56:  # JNE
+            pc = registers[a] if not fl & flag_equal else pc + 2
+        elif op == 0x57:  # JGT
+            pc = registers[a] if fl & flag_greater else pc + 2
+        elif op == 0x58:  # JLT
+            pc = registers[a] if fl & flag_less else pc + 2
+        elif op == 0x59:  # JLE
+            pc = registers[a] if fl & (flag_equal | flag_less) else pc + 2
+        elif op == 0x5A:  # JGE
+            pc = registers[a] if fl & (flag_equal | flag_greater) else pc + 2
+        elif op == 0x82:  # LDI
+            registers[a] = b
+            pc += 3
+        elif op == 0x83:  # LD
+            registers[a] = ram[rb & 0xFF]
+            pc += 3
+        elif op == 0x84:  # ST
+            ram[registers[a] & 0xFF] = rb & 0xFF
+            pc += 3
+        elif op == 0xA0:  # ADD
+            registers[a] = (registers[a] + rb) & 0xFF
+            pc += 3
+        elif op == 0xA1:  # SUB
+            registers[a] = (registers[a] - rb) & 0xFF
+            pc += 3
+        elif op == 0xA2:  # MUL
+            registers[a] = (registers[a] * rb) & 0xFF
+            pc += 3
+        elif op == 0xA3:  # DIV
+            registers[a] = registers[a] // rb
+            pc += 3
+        elif op == 0xA4:  # MOD
+            registers[a] = registers[a] % rb
+            pc += 3
+        elif op == 0x65:  # INC
+            registers[a] = (registers[a] + 1) & 0xFF
+            pc += 2
+        elif op == 0x66:  # DEC
+            registers[a] = (registers[a] - 1) & 0xFF
+            pc += 2
+        elif op == 0xA7:  # CMP
+            fl = (
+                (flag_equal if registers[a] == rb else 0) |
+                (flag_less if registers[a] < rb else 0) |
+                (flag_greater if registers[a] > rb else 0)
+            )
+            pc += 3
+        elif op == 0xA8:  # AND
+            registers[a] = registers[a] & rb
+            pc += 3
+        elif op == 0x69:  # NOT
+            registers[a] = ~registers[a] & 0xFF
+            pc += 2
+        elif op == 0xAA:  # OR
+            registers[a] = registers[a] | rb
+            pc += 3
+        elif op == 0xAB:  # XOR
+            registers[a] = registers[a] ^ rb
+            pc += 3
+        elif op == 0xAC:  # SHL
+            registers[a] = (registers[a] << rb) & 0xFF if 0 <= rb < 8 else 0
+            pc += 3
+        elif op == 0xAD:  # SHR
+            registers[a] = registers[a] >> rb if 0 <= rb < 8 else 0
+            pc += 3
+        elif op == 0xB0:  # ADDI
+            registers[a] = (registers[a] + b) & 0xFF
+            pc += 3
+        else:
+            return pc, fl, n
+
+    return pc, fl, limit
+
+
+def run_cpu(cpu: "CPU"):
+    """
+    Run the program currently loaded into the CPU's RAM, executing
+    everything but I/O and interrupt handling natively
+    """
+
+    ram = np.frombuffer(cpu.ram, dtype=np.uint8)
+    registers = np.frombuffer(cpu.registers, dtype=np.int32)
+
+    cpu.run_with(run, ram, registers)